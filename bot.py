@@ -8,11 +8,14 @@ import os
 import json
 import asyncio
 import logging
+import tempfile
+from contextlib import nullcontext
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, ContextTypes, filters
 from dotenv import load_dotenv
 from monitor import StockMonitor
+from profiler import CycleProfiler, trace, trace_product
 
 load_dotenv()
 
@@ -35,6 +38,7 @@ class StockBot:
         self.monitor = StockMonitor()
         self.check_interval = self.settings.get('check_interval', 5)
         self.waiting_for = {}  # user_id -> action
+        self.profiler = None  # 开启后记录接下来 N 轮检查
         
     def load_json(self, path, default):
         try:
@@ -70,7 +74,8 @@ class StockBot:
              InlineKeyboardButton("➕ 添加目标", callback_data="add_target")],
             [InlineKeyboardButton("⏱ 检查频率", callback_data="interval"),
              InlineKeyboardButton("📊 运行状态", callback_data="status")],
-            [InlineKeyboardButton("🧪 测试推送", callback_data="test_push")]
+            [InlineKeyboardButton("🧪 测试推送", callback_data="test_push"),
+             InlineKeyboardButton("🔬 性能分析", callback_data="profile")]
         ]
         return InlineKeyboardMarkup(keyboard)
 
@@ -138,6 +143,11 @@ class StockBot:
             await query.edit_message_text(f"✅ 检查频率已设为 {sec} 秒", reply_markup=self.back_menu())
         elif data == "test_push":
             await self.test_push(query)
+        elif data == "profile":
+            await self.show_profile(query)
+        elif data.startswith("profile_"):
+            parts = data.split("_")
+            await self.start_profile(query, int(parts[1]), len(parts) > 2)
 
     def back_menu(self):
         return InlineKeyboardMarkup([[InlineKeyboardButton("🔙 返回菜单", callback_data="menu")]])
@@ -201,6 +211,8 @@ class StockBot:
 📦 监控商品: {len(self.products)} 个
 🎯 推送目标: {len(self.targets)} 个
 ⏱ 检查频率: {self.check_interval} 秒"""
+        if self.profiler:
+            msg += f"\n🔬 性能分析: {self.profiler.cycle}/{self.profiler.cycles} 轮"
         await query.edit_message_text(msg, reply_markup=self.back_menu(), parse_mode='Markdown')
 
     async def test_push(self, query):
@@ -246,6 +258,52 @@ class StockBot:
         
         await query.edit_message_text(f"✅ 测试推送完成\n发送到 {sent} 个目标", reply_markup=self.back_menu())
 
+    async def show_profile(self, query):
+        if self.profiler:
+            await query.edit_message_text(
+                f"🔬 性能分析进行中: {self.profiler.cycle}/{self.profiler.cycles} 轮",
+                reply_markup=self.back_menu()
+            )
+            return
+        keyboard = [
+            [InlineKeyboardButton("1轮", callback_data="profile_1"),
+             InlineKeyboardButton("3轮", callback_data="profile_3"),
+             InlineKeyboardButton("5轮", callback_data="profile_5")],
+            [InlineKeyboardButton("3轮 + 堆栈采样", callback_data="profile_3_stack")],
+            [InlineKeyboardButton("🔙 返回", callback_data="menu")]
+        ]
+        await query.edit_message_text("🔬 记录接下来几轮检查？", reply_markup=InlineKeyboardMarkup(keyboard))
+
+    async def start_profile(self, query, cycles, sample):
+        if self.profiler:
+            await query.edit_message_text("⚠️ 性能分析已在进行", reply_markup=self.back_menu())
+            return
+        self.profiler = CycleProfiler(cycles, sample_interval=0.01 if sample else None)
+        await query.edit_message_text(
+            f"✅ 将记录接下来 {cycles} 轮检查\n完成后发送 trace 文件和最慢商品",
+            reply_markup=self.back_menu()
+        )
+
+    async def finish_profile(self, app, profiler):
+        """导出 trace 并发送给管理员"""
+        profiler.stop()
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            profiler.export(path)
+            await app.bot.send_message(chat_id=self.admin_id, text=profiler.summary())
+            with open(path, 'rb') as f:
+                await app.bot.send_document(
+                    chat_id=self.admin_id,
+                    document=f,
+                    filename=f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    caption="chrome://tracing 或 ui.perfetto.dev 打开"
+                )
+        except Exception as e:
+            logger.error(f"性能分析结果发送失败: {e}")
+        finally:
+            os.remove(path)
+
     async def show_interval(self, query):
         keyboard = [
             [InlineKeyboardButton("5秒", callback_data="interval_5"),
@@ -397,41 +455,55 @@ class StockBot:
             except Exception as e:
                 logger.error(f"发送失败 {t}: {e}")
 
+    async def check_once(self, app, p):
+        """检查单个商品，状态变化时推送"""
+        info = await self.monitor.parse_product(p['url'])
+        # 如果返回列表，根据名称匹配
+        if isinstance(info, list):
+            for item in info:
+                if item.get('name') == p['name']:
+                    info = item
+                    break
+            else:
+                info = None
+        if info and isinstance(info, dict):
+            was_in = p.get('in_stock', False)
+            now_in = info.get('in_stock', False)
+            
+            p['in_stock'] = now_in
+            p['price'] = info.get('price', p['price'])
+            if info.get('url'): p['url'] = info['url']
+            p['last_check'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            if not was_in and now_in:
+                with trace('notify'):
+                    await self.notify(app, p, True)
+                logger.info(f"补货: {p['name']}")
+            elif was_in and not now_in:
+                with trace('notify'):
+                    await self.notify(app, p, False)
+                logger.info(f"缺货: {p['name']}")
+            
+            with trace('save_products'):
+                self.save_products()
+
     async def monitor_loop(self, app):
         """定时检查库存"""
         await asyncio.sleep(3)
         while True:
-            for p in self.products:
-                try:
-                    info = await self.monitor.parse_product(p['url'])
-                    # 如果返回列表，根据名称匹配
-                    if isinstance(info, list):
-                        for item in info:
-                            if item.get('name') == p['name']:
-                                info = item
-                                break
-                        else:
-                            info = None
-                    if info and isinstance(info, dict):
-                        was_in = p.get('in_stock', False)
-                        now_in = info.get('in_stock', False)
-                        
-                        p['in_stock'] = now_in
-                        p['price'] = info.get('price', p['price'])
-                        if info.get('url'): p['url'] = info['url']
-                        p['last_check'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        
-                        if not was_in and now_in:
-                            await self.notify(app, p, True)
-                            logger.info(f"补货: {p['name']}")
-                        elif was_in and not now_in:
-                            await self.notify(app, p, False)
-                            logger.info(f"缺货: {p['name']}")
-                        
-                        self.save_products()
-                except Exception as e:
-                    logger.error(f"检查失败 {p.get('name')}: {e}")
-                await asyncio.sleep(1)
+            profiler = self.profiler
+            with profiler.run_cycle() if profiler else nullcontext():
+                for p in self.products:
+                    try:
+                        with trace_product(p):
+                            await self.check_once(app, p)
+                    except Exception as e:
+                        logger.error(f"检查失败 {p.get('name')}: {e}")
+                    await asyncio.sleep(1)
+            if profiler and profiler.done:
+                self.profiler = None
+                # 上传放到后台，不耽误下一轮检查
+                asyncio.create_task(self.finish_profile(app, profiler))
             await asyncio.sleep(self.check_interval)
 
 def main():
@@ -5,6 +5,7 @@ import re
 import asyncio
 from urllib.parse import urlparse
 from playwright.async_api import async_playwright
+from profiler import trace
 
 # Misaka 所有地区
 MISAKA_LOCATIONS = [
@@ -26,15 +27,19 @@ class StockMonitor:
     
     async def fetch(self, url):
         try:
-            await self.init_browser()
-            page = await self.browser.new_page()
-            await page.goto(url, wait_until='networkidle', timeout=30000)
+            with trace('browser'):
+                await self.init_browser()
+                page = await self.browser.new_page()
+            with trace('goto', url=url):
+                await page.goto(url, wait_until='networkidle', timeout=30000)
             domain = urlparse(url).netloc
-            if 'misaka' in domain:
-                await asyncio.sleep(5)
-            else:
-                await asyncio.sleep(2)
-            html = await page.content()
+            with trace('wait'):
+                if 'misaka' in domain:
+                    await asyncio.sleep(5)
+                else:
+                    await asyncio.sleep(2)
+            with trace('content'):
+                html = await page.content()
             await page.close()
             return html
         except Exception as e:
@@ -52,16 +57,17 @@ class StockMonitor:
         if not html:
             return None
         
-        if self.is_category_page(html):
-            return await self.parse_category(html, url, domain)
-        
-        return {
-            'merchant': self.get_merchant(html, domain, url),
-            'name': self.get_name(html, url),
-            'price': self.get_price(html),
-            'specs': self.get_specs(html),
-            'in_stock': self.check_stock(html)
-        }
+        with trace('parse'):
+            if self.is_category_page(html):
+                return await self.parse_category(html, url, domain)
+            
+            return {
+                'merchant': self.get_merchant(html, domain, url),
+                'name': self.get_name(html, url),
+                'price': self.get_price(html),
+                'specs': self.get_specs(html),
+                'in_stock': self.check_stock(html)
+            }
     
     async def parse_misaka_all(self, url):
         """解析 Misaka 所有地区"""
@@ -74,7 +80,8 @@ class StockMonitor:
             loc_url = f"https://app.misaka.io/iaas/vm/create/{loc_code}/{plan}"
             html = await self.fetch(loc_url)
             if html:
-                info = self.parse_misaka_single(html, loc_url, loc_code, loc_name, plan)
+                with trace('parse'):
+                    info = self.parse_misaka_single(html, loc_url, loc_code, loc_name, plan)
                 info['url'] = loc_url
                 products.append(info)
         
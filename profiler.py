@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""检查周期性能分析 - 记录各阶段耗时并导出 Chrome trace"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# 仅在 monitor_loop 的检查周期内设置，其他任务（手动检查等）不会被记录
+_current = ContextVar('profiler', default=None)
+_NULL = nullcontext()
+
+MAX_SAMPLES = 20000  # 堆栈采样上限，避免 trace 文件过大
+MAX_DEPTH = 30
+
+
+def trace(name, **args):
+    """记录一个阶段耗时，未开启分析时直接返回空上下文"""
+    prof = _current.get()
+    if prof is None:
+        return _NULL
+    return prof.span(name, **args)
+
+
+def trace_product(product):
+    """记录单个商品的检查耗时"""
+    prof = _current.get()
+    if prof is None:
+        return _NULL
+    return prof.product(f"#{product['id']} {product['name']}")
+
+
+class CycleProfiler:
+    def __init__(self, cycles, sample_interval=None):
+        self.cycles = cycles
+        self.sample_interval = sample_interval
+        self.cycle = 0
+        self.events = []
+        self.products = {}  # 商品 -> {'runs': [耗时], 'stages': {阶段: 累计耗时}}
+        self._product = None
+        self._start = time.perf_counter_ns()
+        self._stop = threading.Event()
+        self._sampler = None
+        self.samples = 0
+        self.frames = {}  # (父 id, code, 行号) -> stackFrames id
+        self.stack_frames = {}  # trace-event stackFrames 表
+
+    @property
+    def done(self):
+        return self.cycle >= self.cycles
+
+    def _now(self):
+        """相对开始时间的微秒数 (trace-event 的时间单位)"""
+        return (time.perf_counter_ns() - self._start) // 1000
+
+    @contextmanager
+    def span(self, name, cat='stage', **args):
+        ts = self._now()
+        try:
+            yield
+        finally:
+            dur = self._now() - ts
+            self.events.append({
+                'name': name, 'cat': cat, 'ph': 'X',
+                'ts': ts, 'dur': dur, 'pid': 1, 'tid': 1, 'args': args
+            })
+            if cat == 'product':
+                self.products[name]['runs'].append(dur)
+            elif cat == 'stage' and self._product:
+                stages = self.products[self._product]['stages']
+                stages[name] = stages.get(name, 0) + dur
+
+    @contextmanager
+    def product(self, name):
+        self.products.setdefault(name, {'runs': [], 'stages': {}})
+        self._product = name
+        try:
+            with self.span(name, cat='product'):
+                yield
+        finally:
+            self._product = None
+
+    @contextmanager
+    def run_cycle(self):
+        """包裹一轮检查，期间的 trace() 调用会被记录"""
+        token = _current.set(self)
+        if self.sample_interval:
+            # 只在周期内采样，周期间的 sleep 不记录
+            self._stop.clear()
+            self._sampler = threading.Thread(
+                target=self._sample, args=(threading.get_ident(),), daemon=True
+            )
+            self._sampler.start()
+        self.cycle += 1
+        try:
+            with self.span(f"cycle {self.cycle}", cat='cycle'):
+                yield
+        finally:
+            _current.reset(token)
+            self.stop()
+
+    def stop(self):
+        """停止采样线程并等待其退出"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample(self, thread_id):
+        """后台线程定时采样事件循环线程的 Python 堆栈"""
+        while self.samples < MAX_SAMPLES and not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            # 直接遍历 f_back，不构造 FrameSummary、不读源码行
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append((frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            sf = None
+            for code, lineno in reversed(stack):
+                sf = self._frame_id(sf, code, lineno)
+            self.samples += 1
+            self.events.append({
+                'name': self.stack_frames[sf]['name'] if sf else 'sample', 'cat': 'sample',
+                'ph': 'i', 's': 't', 'ts': self._now(), 'pid': 1, 'tid': 2, 'sf': sf
+            })
+
+    def _frame_id(self, parent, code, lineno):
+        """相同调用路径只在 stackFrames 表中存一次"""
+        key = (parent, code, lineno)
+        sf = self.frames.get(key)
+        if sf is None:
+            sf = str(len(self.frames) + 1)
+            self.frames[key] = sf
+            node = {'name': f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})", 'category': 'python'}
+            if parent:
+                node['parent'] = parent
+            self.stack_frames[sf] = node
+        return sf
+
+    def export(self, path):
+        """导出 Chrome trace-event JSON，可在 chrome://tracing 或 Perfetto 打开"""
+        meta = [
+            {'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'tg-stock-monitor'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 1, 'args': {'name': 'monitor_loop'}},
+        ]
+        if self.sample_interval:
+            meta.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 2, 'args': {'name': 'samples'}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'traceEvents': meta + self.events,
+                'stackFrames': self.stack_frames,
+                'displayTimeUnit': 'ms'
+            }, f, ensure_ascii=False)
+
+    def summary(self, top=5):
+        """最慢商品 Top N 文字摘要"""
+        cycles = [e['dur'] for e in self.events if e['cat'] == 'cycle']
+        avg_cycle = sum(cycles) / len(cycles) / 1e6 if cycles else 0
+        sampling = f"每 {self.sample_interval * 1000:g}ms" if self.sample_interval else "关闭"
+        lines = [
+            "⏱ 性能分析完成",
+            "",
+            f"周期: {len(cycles)} 轮  平均耗时: {avg_cycle:.2f}s",
+            f"堆栈采样: {sampling}",
+        ]
+
+        rows = []
+        for name, rec in self.products.items():
+            runs = rec['runs']
+            if runs:
+                rows.append((sum(runs) / len(runs), max(runs), name, rec['stages'], len(runs)))
+        rows.sort(key=lambda r: r[0], reverse=True)
+
+        if not rows:
+            lines.append("\n没有检查记录")
+            return '\n'.join(lines)
+
+        lines.append(f"\n最慢商品 Top {min(top, len(rows))}:")
+        for i, (avg, worst, name, stages, n) in enumerate(rows[:top], 1):
+            slow = sorted(stages.items(), key=lambda s: s[1], reverse=True)[:2]
+            detail = ', '.join(f"{stage} {dur / n / 1e6:.2f}s" for stage, dur in slow)
+            lines.append(f"{i}. {name}")
+            lines.append(f"   平均 {avg / 1e6:.2f}s / 最长 {worst / 1e6:.2f}s" + (f" · {detail}" if detail else ""))
+        return '\n'.join(lines)
@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiler import CycleProfiler, trace, trace_product, _NULL
+
+
+def run(prof, products, cycles):
+    async def loop():
+        for _ in range(cycles):
+            with prof.run_cycle():
+                for p, delay in products:
+                    with trace_product(p):
+                        with trace('goto'):
+                            await asyncio.sleep(delay)
+                        with trace('parse'):
+                            pass
+    asyncio.run(loop())
+
+
+def test_trace_is_null_outside_cycle():
+    assert trace('goto') is _NULL
+    assert trace_product({'id': 1, 'name': 'a'}) is _NULL
+
+
+def test_cycles_and_stages():
+    prof = CycleProfiler(2)
+    assert not prof.done
+    run(prof, [({'id': 1, 'name': 'fast'}, 0.01), ({'id': 2, 'name': 'slow'}, 0.05)], 2)
+    assert prof.cycle == 2
+    assert prof.done
+    assert len(prof.products['#2 slow']['runs']) == 2
+    assert prof.products['#2 slow']['stages']['goto'] >= 2 * 50000
+    assert prof.products['#1 fast']['stages']['goto'] < prof.products['#2 slow']['stages']['goto']
+    assert set(prof.products['#1 fast']['stages']) == {'goto', 'parse'}
+    assert trace('goto') is _NULL
+
+
+def test_export_and_summary(tmp_path):
+    prof = CycleProfiler(1, sample_interval=0.001)
+
+    async def loop():
+        with prof.run_cycle():
+            with trace_product({'id': 1, 'name': 'fast'}):
+                await asyncio.sleep(0.01)
+            with trace_product({'id': 2, 'name': 'slow'}):
+                end = time.perf_counter() + 0.05
+                while time.perf_counter() < end:
+                    pass
+    asyncio.run(loop())
+
+    path = tmp_path / 'trace.json'
+    prof.export(path)
+    data = json.loads(path.read_text(encoding='utf-8'))
+    events = data['traceEvents']
+    assert {e['ph'] for e in events} >= {'M', 'X'}
+    for e in events:
+        if e['ph'] == 'X':
+            assert e['ts'] >= 0 and e['dur'] >= 0
+        if e['ph'] == 'i':
+            assert e['sf'] in data['stackFrames']
+
+    summary = prof.summary()
+    assert summary.index('#2 slow') < summary.index('#1 fast')